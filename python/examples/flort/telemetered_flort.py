@@ -27,9 +27,11 @@ def main():
     deployments = list_deployments(site, node, sensor)
     deploy = deployments[-1]
 
-    # download the data
+    # download the data, skipping the variables flort_datalogger would drop anyway
     tag = 'deployment{:04g}.*FLORT.*\\.nc$'.format(deploy)
-    flort = load_gc_thredds(site, node, sensor, method, stream, tag)
+    drop_vars = ['internal_timestamp', 'suspect_timestamp', 'measurement_wavelength_beta',
+                 'measurement_wavelength_cdom', 'measurement_wavelength_chl']
+    flort = load_gc_thredds(site, node, sensor, method, stream, tag, drop_variables=drop_vars)
 
     # clean-up and reorganize
     flort = flort_datalogger(flort, burst=True)
@@ -44,7 +46,9 @@ def main():
     out_file = ('%s.%s.%s.deploy%02d.%s.%s.nc' % (site.lower(), level, instrmt, deploy, method, stream))
     nc_out = os.path.join(out_path, out_file)
 
-    flort.to_netcdf(nc_out, mode='w', format='NETCDF4', engine='h5netcdf', encoding=ENCODINGS)
+    # write with the default netCDF4 engine, which is faster than h5netcdf for these
+    # (uncompressed) burst-averaged records and writes files any netCDF-C tool can read
+    flort.to_netcdf(nc_out, mode='w', format='NETCDF4', encoding=ENCODINGS)
 
 
 if __name__ == '__main__':
@@ -111,6 +111,29 @@ class InputError(Error):
         self.message = message
 
 
+def _init_worker(n_threads):
+    """Limit the number of threads used by the numba kernels (and FFTs) in each worker process."""
+    import numba
+    numba.set_num_threads(n_threads)
+
+
+def worker_pool(n_workers=N_CORES):
+    """
+    Create a pool of n_workers worker processes for the numba accelerated
+    processing, splitting the numba threads between the workers to avoid
+    oversubscribing the cores. The workers are spawned rather than forked,
+    since forking a process that has already started the numba thread pool
+    is not safe, so scripts using the pool must do so from within an
+    ``if __name__ == '__main__':`` block. Callers should only create the
+    pool with at least 2 workers, processing serially otherwise.
+    """
+    import multiprocessing
+    import numba
+    n_threads = max(1, numba.config.NUMBA_NUM_THREADS // n_workers)
+    return ProcessPoolExecutor(max_workers=n_workers, mp_context=multiprocessing.get_context('spawn'),
+                               initializer=_init_worker, initargs=(n_threads,))
+
+
 def convert_time(ms):
     """Calculate UTC timestamp from OOI milliseconds"""
     if ms is None:
@@ -752,7 +775,7 @@ def m2m_collect(data, tag='.*\\.nc$', use_dask=False):
     return data
 
 
-def load_gc_thredds(site, node, sensor, method, stream, tag='.*\\.nc$', use_dask=False):
+def load_gc_thredds(site, node, sensor, method, stream, tag='.*\\.nc$', use_dask=False, drop_variables=None):
     """
     Download data from the OOI Gold Copy THREDDS catalog, using the reference
     designator parameters to select the catalog of interest and the regex tag
@@ -773,15 +796,17 @@ def load_gc_thredds(site, node, sensor, method, stream, tag='.*\\.nc$', use_dask
     :param tag: regex pattern to select the NetCDF files to download
     :param use_dask: Boolean flag indicating whether to load the data using
         dask arrays (default=False)
+    :param drop_variables: list of variables to skip when opening the data
+        files (default=None, all variables are loaded)
     :return data: All the data, combined into a single dataset
     """
     # download the data from the Gold Copy THREDDS server
     dataset_id = '-'.join([site, node, sensor, method, stream]) + '/catalog.html'
-    data = gc_collect(dataset_id, tag, use_dask)
+    data = gc_collect(dataset_id, tag, use_dask, drop_variables)
     return data
 
 
-def gc_collect(dataset_id, tag='.*\\.nc$', use_dask=False):
+def gc_collect(dataset_id, tag='.*\\.nc$', use_dask=False, drop_variables=None):
     """
     Use a regex tag combined with the dataset ID to collect data from the OOI
     Gold Copy THREDDS catalog. The collected data is gathered into a xarray
@@ -792,6 +817,8 @@ def gc_collect(dataset_id, tag='.*\\.nc$', use_dask=False):
         collect the data files of interest
     :param use_dask: Boolean flag indicating whether to load the data using
         dask arrays (default=False)
+    :param drop_variables: list of variables to skip when opening the data
+        files (default=None, all variables are loaded)
     :return gc: the collected Gold Copy data as a xarray dataset
     """
     # construct the THREDDS catalog URL based on the dataset ID
@@ -806,12 +833,11 @@ def gc_collect(dataset_id, tag='.*\\.nc$', use_dask=False):
     print('Downloading %d data file(s) from the OOI Gold Copy THREDSS catalog' % len(files))
     if len(files) <= 5:
         # just 1 to 5 files, download sequentially
-        frames = [process_file(file, gc='GC', use_dask=use_dask) for file in tqdm(files, desc='Downloading and '
-                                                                                              'Processing the Data '
-                                                                                              'Files')]
+        frames = [process_file(file, gc='GC', use_dask=use_dask, drop_variables=drop_variables)
+                  for file in tqdm(files, desc='Downloading and Processing the Data Files')]
     else:
         # multiple files, use multithreading to download concurrently
-        part_files = partial(process_file, gc='GC', use_dask=use_dask)
+        part_files = partial(process_file, gc='GC', use_dask=use_dask, drop_variables=drop_variables)
         with ProcessPoolExecutor(max_workers=N_CORES) as executor:
             frames = list(tqdm(executor.map(part_files, files), total=len(files),
                                desc='Downloading and Processing the Data Files', file=sys.stdout))
@@ -939,7 +965,7 @@ def list_files(url, tag='.*\\.nc$'):
     return [node.get('href') for node in soup.find_all('a', string=pattern)]
 
 
-def process_file(catalog_file, gc=None, use_dask=False):
+def process_file(catalog_file, gc=None, use_dask=False, drop_variables=None):
     """
     Function to download one of the NetCDF files as a xarray data set, convert
     to time as the appropriate dimension instead of obs, and drop the
@@ -958,6 +984,9 @@ def process_file(catalog_file, gc=None, use_dask=False):
         to abort.
     :param use_dask: Boolean flag indicating whether to load the data using
         dask arrays (default = False)
+    :param drop_variables: list of variables to skip when opening the file,
+        avoiding the cost of decoding variables that are not needed (default
+        = None, all variables are loaded)
     :return: downloaded data in a xarray dataset.
     """
     if gc in ['GC', 'M2M', 'KDATA']:
@@ -983,9 +1012,10 @@ def process_file(catalog_file, gc=None, use_dask=False):
         raise InputError('gc must be either GC, M2M, or KDATA')
 
     if use_dask:
-        ds = xr.open_dataset(data, decode_cf=False, chunks='auto', mask_and_scale=False)
+        ds = xr.open_dataset(data, decode_cf=False, chunks='auto', mask_and_scale=False,
+                             drop_variables=drop_variables)
     else:
-        ds = xr.load_dataset(data, decode_cf=False, mask_and_scale=False)
+        ds = xr.load_dataset(data, decode_cf=False, mask_and_scale=False, drop_variables=drop_variables)
 
     # convert the dimensions from obs to time and get rid of obs and other variables we don't need
     ds = ds.swap_dims({'obs': 'time'})
@@ -1,15 +1,63 @@
+import contextlib
 import datetime
+import mmap
+import os
+import sys
+import time
 
+import numba
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from scipy import integrate, interpolate
 from scipy.signal import detrend, filtfilt
+from tqdm import tqdm
+
+from ooi_data_explorations.common import N_CORES, worker_pool
 
 
 PADLENGTH = 12 # (3*(np.max([len(bhi), len(ahi)]) - 1) == 12)
 
+#JBE Redefine files for 10 Hz and tc1=12 or 15 or 20.  Use digits(16) and
+#vpa(ahiwaves). High-pass filter coefficients (ahi, bhi) keyed by tc1, built
+#once here rather than on every call to process_fdchp.
+HIGH_PASS_FILTERS = {
+    12: (np.array([1.000000000000000,  -3.869797539975555,   5.617802044587569,  -3.625896801659086,   0.877898078061702]),
+         np.array([0.9, 36962154017745,  -3.747848616070978,   5.621772924106467,  -3.747848616070978,   0.936962154017745])),
+    15: (np.array([1.000000000000000,  -3.895833876325376,   5.692892648957240,  -3.698121672490409,   0.901065298297354]),
+         np.array([0.949244593504399,  -3.796978374017595,   5.695467561026392,  -3.796978374017595,   0.949244593504399])),
+    20: (np.array([1.000000000000000,  -3.921872982100935,   5.768656400578301,  -3.771625137827138,   0.924842488052324]),
+         np.array([0.961687313034919,  -3.846749252139674,   5.770123878209512,  -3.846749252139674,   0.961687313034919])),
+}
+
+#JBE Redefine files for 10 Hz and fcwaves=1/40 or 1/30. Wave filter
+#coefficients (ahiwaves, bhiwaves) keyed by tcwave.
+WAVE_FILTERS = {
+    40: (np.array([1.000000000000000,  -3.960935321365416,  5.883567180614652, -3.884319737084527,  0.961687926819144]),
+         np.array([0.980656885367734,  -3.922627541470935,  5.883941312206403, -3.922627541470935,  0.980656885367734])),
+    30: (np.array([1.0000000000000000, -3.947914166208924,  5.845094680183927, -3.846426389902994,  0.9492460297427443]),
+         np.array([0.9742925791274119, -3.897170316509647,  5.845755474764471, -3.897170316509647,  0.9742925791274119])),
+}
+
+# raw sensor samples, stored as float32 by the readers to halve the memory and cache footprint of each file. The
+# speed of sound is kept in float64, since the sonic temperature (and so the heat flux) derived from it is sensitive
+# to its rounding
+SENSOR_COLUMNS = ['fdchp_wind_x', 'fdchp_wind_y', 'fdchp_wind_z',
+                  'fdchp_heading', 'fdchp_roll', 'fdchp_pitch',
+                  'fdchp_x_ang_rate', 'fdchp_y_ang_rate', 'fdchp_z_ang_rate',
+                  'fdchp_x_accel_g', 'fdchp_y_accel_g', 'fdchp_z_accel_g']
+
+# latitude and position of the anemometer relative to the motion sensors, keyed by the array
+SITE_SETTINGS = {
+    'PA': (40.1334, np.array([-0.75, 0.0, -5.0])),  # Pioneer NES
+    'IS': (59.9337, np.array([-0.75, 0.0, -6.0])),  # Irminger Sea
+    'CE': (44.6393, np.array([-0.5, -0.5, -5.0])),  # Endurance
+}
+
 
 def process_fdchp(raw_data, latitude, anemometer_relative_position, tc1=20, tcwave=30, despike=True, despikecompass=False, flux_filepath=None):
     # JBE 06/29 JW 11Aug2014
@@ -28,6 +76,7 @@ def process_fdchp(raw_data, latitude, anemometer_relative_position, tc1=20, tcwa
     """
     
     # Note: raw_data is expected to be in NWU coordinates, which is the default returned by the fdchp_utils.particles_to_pandas() function
+    # The sensor samples may be stored as float32 (see SENSOR_COLUMNS); they are upcast to float64 here for the processing
     dt = 0.1 # Sampling period for FDCHP; 10 Hz
     fs = 1/dt # Sampling frequency for Windmaster
 
@@ -42,26 +91,9 @@ def process_fdchp(raw_data, latitude, anemometer_relative_position, tc1=20, tcwa
     version_number=4.0
     status_val = 1 #uint32
 
-    #JBE Redefine files for 10 Hz and tc1=12 or 15 or 20.  Use digits(16) and
-    #vpa(ahiwaves)
-    if tc1==12:        #JBE Redefine filters for 10 Hz and tc1=12 with ludo=1
-        ahi=[1.000000000000000,  -3.869797539975555,   5.617802044587569,  -3.625896801659086,   0.877898078061702]
-        bhi=[0.9, 36962154017745,  -3.747848616070978,   5.621772924106467,  -3.747848616070978,   0.936962154017745]
-    elif tc1==15:           #JBE Redefine filters for 10 Hz and tc1=15 with ludo=1
-        ahi=[1.000000000000000,  -3.895833876325376,   5.692892648957240,  -3.698121672490409,   0.901065298297354]
-        bhi=[0.949244593504399,  -3.796978374017595,   5.695467561026392,  -3.796978374017595,   0.949244593504399]
-    else:
-        ahi=[1.000000000000000,  -3.921872982100935,   5.768656400578301,  -3.771625137827138,   0.924842488052324]
-        bhi=[0.961687313034919,  -3.846749252139674,   5.770123878209512,  -3.846749252139674,   0.961687313034919]
-
-    #JBE Redefine files for 10 Hz and fcwaves=1/40;
-    if tcwave==40:
-        ahiwaves = [1.000000000000000,  -3.960935321365416,  5.883567180614652, -3.884319737084527,  0.961687926819144]
-        bhiwaves = [0.980656885367734,  -3.922627541470935,  5.883941312206403, -3.922627541470935,  0.980656885367734]
-    else:
-        #JBE Redefine files for 10 Hz and fcwaves=1/30;
-        ahiwaves = [1.0000000000000000, -3.947914166208924,  5.845094680183927, -3.846426389902994,  0.9492460297427443]
-        bhiwaves = [0.9742925791274119, -3.897170316509647,  5.845755474764471, -3.897170316509647,  0.9742925791274119]
+    # high-pass filters for the motion correction and the wave heights, see HIGH_PASS_FILTERS and WAVE_FILTERS
+    ahi, bhi = HIGH_PASS_FILTERS.get(tc1, HIGH_PASS_FILTERS[20])
+    ahiwaves, bhiwaves = WAVE_FILTERS.get(tcwave, WAVE_FILTERS[30])
 
     num_datapoints=len(raw_data)
     mean_time = raw_data['time'].mean()
@@ -80,7 +112,7 @@ def process_fdchp(raw_data, latitude, anemometer_relative_position, tc1=20, tcwa
     #UNITS Velocities seem to be stored as cm/s, and must be converted to m/s
     #TODO: is this right for the case where this already represents a temperature?
     # This is the sonic temperature computed from speed of sound
-    sos=raw_data['fdchp_speed_of_sound_sonic'].to_numpy()*0.01 
+    sos=raw_data['fdchp_speed_of_sound_sonic'].to_numpy(dtype=np.float64)*0.01 
     if np.nanmedian(sos) < 50:
         Tv = sos
     else:
@@ -94,7 +126,7 @@ def process_fdchp(raw_data, latitude, anemometer_relative_position, tc1=20, tcwa
     # sonic velocities
      # These are the 3-axis sonic wind velocities
      # Apparently stored as cm/s on disk; converted here to m/s.
-    sonics=raw_data[['fdchp_wind_x', 'fdchp_wind_y', 'fdchp_wind_z']].to_numpy()*0.01
+    sonics=raw_data[['fdchp_wind_x', 'fdchp_wind_y', 'fdchp_wind_z']].to_numpy(dtype=np.float64)*0.01
 
     if despike:                                # Remove obvious spikes in the data
         sonics = despikesimple(sonics)
@@ -111,9 +143,9 @@ def process_fdchp(raw_data, latitude, anemometer_relative_position, tc1=20, tcwa
     # UNITS-Roll, pitch and yaw are in radians
     #***********************************************
 
-    compass=raw_data['fdchp_heading']  # heading
-    roll=raw_data['fdchp_roll']
-    pitch=raw_data['fdchp_pitch'] 
+    compass=raw_data['fdchp_heading'].astype(np.float64)  # heading
+    roll=raw_data['fdchp_roll'].astype(np.float64)
+    pitch=raw_data['fdchp_pitch'].astype(np.float64)
 
 
     gx=np.cos(compass)
@@ -137,7 +169,7 @@ def process_fdchp(raw_data, latitude, anemometer_relative_position, tc1=20, tcwa
     # UNITS - Rates are in radian/sec
     #***********************************************
     # This will hold the angular rates
-    ang_rates = raw_data[['fdchp_x_ang_rate','fdchp_y_ang_rate','fdchp_z_ang_rate']].to_numpy()
+    ang_rates = raw_data[['fdchp_x_ang_rate','fdchp_y_ang_rate','fdchp_z_ang_rate']].to_numpy(dtype=np.float64)
     if despike:
         ang_rates = despikesimple(ang_rates)
 
@@ -145,7 +177,7 @@ def process_fdchp(raw_data, latitude, anemometer_relative_position, tc1=20, tcwa
     # Then the accelerations
     #***********************************************
     # This will hold the accelerations
-    platform_accelerations = raw_data[['fdchp_x_accel_g', 'fdchp_y_accel_g', 'fdchp_z_accel_g']].to_numpy()
+    platform_accelerations = raw_data[['fdchp_x_accel_g', 'fdchp_y_accel_g', 'fdchp_z_accel_g']].to_numpy(dtype=np.float64)
     if despike:
         platform_accelerations = despikesimple(platform_accelerations)
 
@@ -393,26 +425,9 @@ def process_fdchp_xarray(dataset, latitude, anemometer_relative_position, tc1=20
     version_number=4.0
     status_val = 1 #uint32
 
-    #JBE Redefine files for 10 Hz and tc1=12 or 15 or 20.  Use digits(16) and
-    #vpa(ahiwaves)
-    if tc1==12:        #JBE Redefine filters for 10 Hz and tc1=12 with ludo=1
-        ahi=[1.000000000000000,  -3.869797539975555,   5.617802044587569,  -3.625896801659086,   0.877898078061702]
-        bhi=[0.9, 36962154017745,  -3.747848616070978,   5.621772924106467,  -3.747848616070978,   0.936962154017745]
-    elif tc1==15:           #JBE Redefine filters for 10 Hz and tc1=15 with ludo=1
-        ahi=[1.000000000000000,  -3.895833876325376,   5.692892648957240,  -3.698121672490409,   0.901065298297354]
-        bhi=[0.949244593504399,  -3.796978374017595,   5.695467561026392,  -3.796978374017595,   0.949244593504399]
-    else:
-        ahi=[1.000000000000000,  -3.921872982100935,   5.768656400578301,  -3.771625137827138,   0.924842488052324]
-        bhi=[0.961687313034919,  -3.846749252139674,   5.770123878209512,  -3.846749252139674,   0.961687313034919]
-
-    #JBE Redefine files for 10 Hz and fcwaves=1/40;
-    if tcwave==40:
-        ahiwaves = [1.000000000000000,  -3.960935321365416,  5.883567180614652, -3.884319737084527,  0.961687926819144]
-        bhiwaves = [0.980656885367734,  -3.922627541470935,  5.883941312206403, -3.922627541470935,  0.980656885367734]
-    else:
-        #JBE Redefine files for 10 Hz and fcwaves=1/30;
-        ahiwaves = [1.0000000000000000, -3.947914166208924,  5.845094680183927, -3.846426389902994,  0.9492460297427443]
-        bhiwaves = [0.9742925791274119, -3.897170316509647,  5.845755474764471, -3.897170316509647,  0.9742925791274119]
+    # high-pass filters for the motion correction and the wave heights, see HIGH_PASS_FILTERS and WAVE_FILTERS
+    ahi, bhi = HIGH_PASS_FILTERS.get(tc1, HIGH_PASS_FILTERS[20])
+    ahiwaves, bhiwaves = WAVE_FILTERS.get(tcwave, WAVE_FILTERS[30])
 
     num_datapoints=len(dataset)
     mean_time = dataset['time'].mean()
@@ -561,6 +576,224 @@ def process_fdchp_xarray(dataset, latitude, anemometer_relative_position, tc1=20
     return (fluxes, Uearth, waveheight)
 
 
+def _flux_filepath(filename, output_filepath, output_filename="fluxes{}"):
+    """Path of the flux metrics file written for the raw FDCHP data file."""
+    file_basename = os.path.basename(filename)
+    return os.path.join(output_filepath, output_filename.format(file_basename.split('.dat')[0]))
+
+
+def _scan_raw_files(directory, output_filepath=None):
+    """
+    Walk a directory tree with os.scandir and yield the raw FDCHP data files
+    (*.dat) found, in sorted order. If output_filepath is set, files that
+    already have a flux metrics file in that directory are skipped while
+    scanning.
+    """
+    with os.scandir(directory) as it:
+        entries = sorted(it, key=lambda entry: entry.name)
+    for entry in entries:
+        if entry.is_dir():
+            yield from _scan_raw_files(entry.path, output_filepath)
+        elif entry.name.endswith('.dat'):
+            if output_filepath and os.path.exists(_flux_filepath(entry.path, output_filepath)):
+                continue
+            yield entry.path
+
+
+def _read_raw_file(filename):
+    """
+    Read a raw FDCHP file into a pandas DataFrame. If the FDCHP_USE_PARQUET
+    environment variable is set to 1, the parsed data is saved to a Parquet
+    file alongside the raw file (filename + '.parquet') on the first pass and
+    read back from there on subsequent passes, skipping the slower parsing of
+    the raw file. The cache is re-created if the raw file has been modified
+    since. Requires pyarrow (the optional parquet extra); without it, the raw
+    file is parsed on every pass.
+    """
+    if os.environ.get('FDCHP_USE_PARQUET') != '1':
+        return read_file_to_pandas(filename)
+
+    parquet_file = filename + '.parquet'
+    if os.path.exists(parquet_file) and os.path.getmtime(parquet_file) >= os.path.getmtime(filename):
+        try:
+            return pd.read_parquet(parquet_file, engine='pyarrow')
+        except ImportError:
+            # pyarrow is not installed, carry on without the cache
+            pass
+
+    raw_data = read_file_to_pandas(filename)
+    if raw_data is not None:
+        try:
+            raw_data.to_parquet(parquet_file, engine='pyarrow', compression='zstd')
+        except ImportError:
+            # pyarrow is not installed, carry on without the cache
+            pass
+        except OSError as e:
+            # most likely a read-only raw data directory, carry on without the cache
+            print("Unable to cache {} as Parquet: {}".format(filename, e))
+    return raw_data
+
+
+def _timed_read(filename):
+    """
+    Read a raw FDCHP data file, returning a tuple of either the data or the
+    error raised while reading it, and the time spent reading the file in
+    nanoseconds.
+    """
+    start = time.perf_counter_ns()
+    try:
+        raw_data = _read_raw_file(filename)
+    except Exception as e:
+        raw_data = e
+    return raw_data, time.perf_counter_ns() - start
+
+
+def _process_one(filename, latitude, anemometer_relative_position, output_filepath, output_filename="fluxes{}",
+                 raw=None):
+    """
+    Read and process a single raw FDCHP data file. Used as the worker function
+    for process_raw_files, so it needs to live at the module level in order
+    to be pickled and sent to the worker processes. If the file has already
+    been read (e.g. prefetched on a background thread), the results of
+    _timed_read can be passed in via raw.
+
+    Returns a tuple of the filename and either the processing results
+    (uw, Uearth, waveheight, mean time, read-in and processing times in
+    nanoseconds) or
+    the error that was raised while reading or processing the file.
+    """
+    raw_data, readin_time = raw if raw is not None else _timed_read(filename)
+    if isinstance(raw_data, Exception):
+        return filename, raw_data
+    if raw_data is None:
+        return filename, "Empty file: {}".format(filename)
+
+    data_readin = time.perf_counter_ns()
+    flux_filepath = _flux_filepath(filename, output_filepath, output_filename)
+    try:
+        results = process_fdchp(raw_data, latitude, anemometer_relative_position, flux_filepath=flux_filepath)
+    except Exception as e:
+        # Error processing data; probably too few datapoints
+        return filename, e
+    if results is None:
+        return filename, "Unexpectedly short dataset: {}".format(filename)
+
+    fluxes, Uearth, waveheight = results
+    processed = time.perf_counter_ns()
+    return filename, (fluxes[0], Uearth, waveheight, raw_data['time'].mean(), readin_time, processed - data_readin)
+
+
+def process_raw_files(file_list, output_filepath='fluxes', skip_processed=False, verbose=True):
+    """
+    Process a list of raw FDCHP data files, writing the flux metrics for each
+    file to the output directory and returning the along-wind momentum flux,
+    wind speed and wave height for each file. Each file is independent, so
+    the files are processed in parallel when there are more than a few of
+    them and at least two cores available (N_CORES). The worker processes
+    are spawned, re-importing the calling script, so scripts calling this
+    function must do so from within an ``if __name__ == '__main__':`` block.
+
+    Parameters
+    ----------
+    file_list : List[str] or str
+        Paths to the raw FDCHP data files, or a directory to search (including
+        any subdirectories) for them. The latitude and anemometer position are
+        set from the site designator in the directory or the path of the first
+        file.
+    output_filepath : str, optional
+        Directory to write the per-file flux metrics to. Default is 'fluxes'.
+    skip_processed : bool, optional
+        If True, skip files that already have a flux metrics file in the
+        output directory (e.g. to resume an interrupted run). Skipped files
+        are not included in the returned arrays. Default is False.
+    verbose : bool, optional
+        If True, print the progress and a summary of the processing times and
+        errors. Default is True.
+
+    Returns
+    -------
+    tuple of (numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray, dict)
+        The along-wind momentum flux (uw), the wind speed relative to earth (U),
+        the wave height (sigH), the mean time of each file, and a dictionary of
+        the errors encountered, keyed by filename.
+    """
+    # Set up some variables for FDCHP processing
+    site_path = file_list if isinstance(file_list, str) else file_list[0]
+    instrument_dir = site_path.split('uncabled')[-1]
+    lat, instrument_rel_position = SITE_SETTINGS.get(instrument_dir[:2], SITE_SETTINGS['CE'])
+
+    if isinstance(file_list, str):
+        # find the raw files with os.scandir, skipping any processed files as they are found
+        file_list = list(_scan_raw_files(file_list, output_filepath if skip_processed else None))
+    elif skip_processed:
+        file_list = [f for f in file_list if not os.path.exists(_flux_filepath(f, output_filepath))]
+
+    errors = {}
+    # preallocate the outputs, trimmed to the number of successfully processed files below
+    U = np.empty(len(file_list))
+    uw = np.empty(len(file_list))
+    sigH = np.empty(len(file_list))
+    times = np.empty(len(file_list), dtype='datetime64[ns]')
+    if not os.path.exists(output_filepath):
+        os.makedirs(output_filepath)
+    start = time.perf_counter_ns()
+    if verbose:
+        print("Processing {} files.".format(len(file_list)))
+        print("Start time: {}".format(datetime.datetime.now()))
+
+    part_process = partial(_process_one, latitude=lat, anemometer_relative_position=instrument_rel_position,
+                           output_filepath=output_filepath)
+    if len(file_list) <= 5 or N_CORES < 2:
+        # just a few files (or cores), process sequentially, reading the next file on a background
+        # thread while the current one is processed (the numba kernels release the GIL)
+        results = []
+        with ThreadPoolExecutor(max_workers=1) as reader:
+            pending = deque(reader.submit(_timed_read, filename) for filename in file_list[:1])
+            for i, filename in enumerate(file_list):
+                raw = pending.popleft().result()
+                if i + 1 < len(file_list):
+                    pending.append(reader.submit(_timed_read, file_list[i + 1]))
+                results.append(part_process(filename, raw=raw))
+    else:
+        # multiple files, each file is independent so process them in parallel (the spawned
+        # workers load the compiled kernels from the numba cache)
+        with worker_pool(N_CORES) as executor:
+            # hand the files to the workers in batches to cut the per-file dispatch overhead
+            chunksize = max(1, len(file_list) // (4 * N_CORES))
+            results = list(tqdm(executor.map(part_process, file_list, chunksize=chunksize), total=len(file_list),
+                                desc='Processing the FDCHP files', file=sys.stdout, disable=not verbose))
+
+    data_readin_accumulator = 0
+    data_processed_accumulator = 0
+    n = 0
+    for filename, result in results:
+        if not isinstance(result, tuple):
+            errors[filename] = result
+            continue
+        flux, Uearth, waveheight, mean_time, readin_time, process_time = result
+        uw[n] = flux                  # Fluxes: uw vw wT
+        U[n] = Uearth                 # Wind speed relative to earth
+        sigH[n] = waveheight          # Significant wave height
+        times[n] = pd.Timestamp(mean_time).to_datetime64()
+        n += 1
+        data_readin_accumulator += readin_time
+        data_processed_accumulator += process_time
+
+    uw = uw[:n]
+    U = U[:n]
+    sigH = sigH[:n]
+    times = times[:n]
+
+    if verbose:
+        print("Total read-in time: {:.3f} s, Total process time: {:.3f} s".format(data_readin_accumulator * 1e-9,
+                                                                                data_processed_accumulator * 1e-9))
+        print("{} errors during processing.".format(len(errors)))
+        print("End time: {} (elapsed {:.3f} s)".format(datetime.datetime.now(),
+                                                       (time.perf_counter_ns() - start) * 1e-9))
+
+    return uw, U, sigH, times, errors
+
+
 def convert_data_to_nwu(data):
     """
     Rotate direction, angular rate, and accelerations to North-West-Up coordinate system.
@@ -576,6 +809,22 @@ def exception_handler(exception):
     print("Exception! {}".format(exception))
 
 
+@contextlib.contextmanager
+def _open_raw(file_path):
+    """
+    Open a raw FDCHP data file for parsing as a read-only memory map, so the
+    parser reads straight from the page cache rather than from a second copy
+    of the file held in memory. Empty files cannot be mapped and are returned
+    as the plain file object.
+    """
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield f
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                yield mm
+
+
 def read_file(file_path):
     """Read a file and return a list of Particles.
     Parameters
@@ -593,7 +842,7 @@ def read_file(file_path):
     from mi.dataset.parser.fdchp_a import FdchpAParser
     
     data = []
-    with open(file_path, 'rb') as input:
+    with _open_raw(file_path) as input:
         parser = FdchpAParser(input, exception_handler)
         parser.parse_file()
         parser._file_parsed = True
@@ -602,6 +851,41 @@ def read_file(file_path):
     return data
 
 
+def _build_time(df):
+    """Construct the sample times from the individual date and time component columns, in one vectorized call."""
+    parts = df[['year', 'month', 'day', 'hour', 'minute', 'second', 'millisecond']].astype('int64')
+    return pd.to_datetime(parts.rename(columns={'millisecond': 'ms'}))
+
+
+def _iter_particles(parser):
+    """Yield the particles from an FdchpAParser one record at a time."""
+    particle = parser.get_records()
+    while particle:
+        yield particle[0]
+        particle = parser.get_records()
+
+
+def _particles_to_frame(particles):
+    """
+    Build a DataFrame from FdchpADataParticles in a single pass, appending each
+    value straight onto its column rather than building a dict or DataFrame
+    per particle. The sensor samples in SENSOR_COLUMNS are stored as float32. Returns None if
+    there are no particles.
+    """
+    columns = {}
+    for particle in particles:
+        for value in particle.generate_dict()['values']:
+            columns.setdefault(value['value_id'], []).append(value['value'])
+
+    if not columns:
+        return None
+
+    df = pd.DataFrame(columns)
+    sensors = [c for c in SENSOR_COLUMNS if c in df.columns]
+    df[sensors] = df[sensors].astype(np.float32)
+    return df
+
+
 def read_file_to_pandas(file_path, convert_to_nwu=True):
     """Read a file and convert its contents to a pandas DataFrame.
     Parameters
@@ -622,21 +906,13 @@ def read_file_to_pandas(file_path, convert_to_nwu=True):
     """
     from mi.dataset.parser.fdchp_a import FdchpAParser
 
-    data = []
-    with open(file_path, 'rb') as input:
+    with _open_raw(file_path) as input:
         parser = FdchpAParser(input, exception_handler)
         # parser.parse_file()
-        particle = parser.get_records()
-        
-        while particle:
-            data.append({ value['value_id']: value['value'] for value in particle[0].generate_dict()['values']})
-            particle = parser.get_records()
-    if data:
-        df = pd.DataFrame(data)
-    else:
-        df = None
+        df = _particles_to_frame(_iter_particles(parser))
+
     if df is not None:
-        df['time'] = df.apply(lambda row: datetime.datetime( int(row.year), int(row.month), int(row.day), int(row.hour), int(row.minute), int(row.second), int(row.millisecond)*1000), axis=1)
+        df['time'] = _build_time(df)
         
         if convert_to_nwu:
             # Convert IMU from North East Down coordinate system to North West Up coordinate system to match Sonic.
@@ -663,15 +939,10 @@ def particles_to_pandas(particles, convert_to_nwu=True):
     -----
     - The resulting DataFrame includes a 'time' column constructed from individual date and time components
     """
-    df = None
-    for particle in particles:
-        values = particle.generate_dict()['values']
-        data_dict = { value['value_id']: [value['value']] for value in values}
-        entry = pd.DataFrame.from_dict(data_dict)
-        df = pd.concat([df,entry])
-        
+    df = _particles_to_frame(particles)
+
     if df is not None:
-        df['time'] = df.apply(lambda row: datetime.datetime( int(row.year), int(row.month), int(row.day), int(row.hour), int(row.minute), int(row.second), int(row.millisecond)*1000), axis=1)
+        df['time'] = _build_time(df)
         
         if convert_to_nwu:
             # Convert IMU from North East Down coordinate system to North West Up coordinate system to match Sonic.
@@ -764,31 +1035,45 @@ def gravity_from_latitude(latitude):
     return g
 
 
-def rotate_buoy_to_world(input_angles, euler_angles, iflag = False):
-    # Rotate from buoy frame to world frame
-
-    sinp  = np.sin(euler_angles[:, 0])
-    cosp  = np.cos(euler_angles[:, 0])
-    sint  = np.sin(euler_angles[:, 1])
-    cost  = np.cos(euler_angles[:, 1])
-    sinps = np.sin(euler_angles[:, 2])
-    cosps = np.cos(euler_angles[:, 2])
-
-    up = input_angles[:, 0]
-    vp = input_angles[:, 1]
-    wp = input_angles[:, 2]
-
-    if iflag: #  from xyz to x'y'z'
-        u = up*cost*cosps                   + vp*cost*sinps                   - wp*sint
-        v = up*(sinp*sint*cosps-cosp*sinps) + vp*(sinp*sint*sinps+cosp*cosps) + wp*(cost*sinp)
-        w = up*(cosp*sint*cosps+sinp*sinps) + vp*(cosp*sint*sinps-sinp*cosps) + wp*(cost*cosp)
+# The numba kernels are compiled eagerly (or loaded from the on-disk cache) for the
+# float64 signatures used by the wrappers, when the module is imported. Set the
+# NUMBA_CACHE_DIR environment variable if the package directory is not writable.
+@numba.njit('float64[:, ::1](float64[:], float64[:], float64[:], float64[:], float64[:], float64[:], boolean)',
+            parallel=True, fastmath=True, cache=True, nogil=True)
+def _rotate_buoy_to_world(up, vp, wp, phi, theta, psi, iflag):
+    # Single pass over the samples, computing the rotation matrix entries as
+    # scalars rather than building full-length temporary arrays for each term.
+    # Each sample writes to its own row of the output, so the loop is split
+    # across threads.
+    n = up.shape[0]
+    out = np.empty((n, 3))
+    for i in numba.prange(n):
+        sinp = np.sin(phi[i])
+        cosp = np.cos(phi[i])
+        sint = np.sin(theta[i])
+        cost = np.cos(theta[i])
+        sinps = np.sin(psi[i])
+        cosps = np.cos(psi[i])
+
+        if iflag: #  from xyz to x'y'z'
+            out[i, 0] = up[i]*cost*cosps                   + vp[i]*cost*sinps                   - wp[i]*sint
+            out[i, 1] = up[i]*(sinp*sint*cosps-cosp*sinps) + vp[i]*(sinp*sint*sinps+cosp*cosps) + wp[i]*(cost*sinp)
+            out[i, 2] = up[i]*(cosp*sint*cosps+sinp*sinps) + vp[i]*(cosp*sint*sinps-sinp*cosps) + wp[i]*(cost*cosp)
+
+        else: # from x'y'z' to xyz
+            out[i, 0] = up[i]*cost*cosps + vp[i]*(sinp*sint*cosps-cosp*sinps) + wp[i]*(cosp*sint*cosps+sinp*sinps)
+            out[i, 1] = up[i]*cost*sinps + vp[i]*(sinp*sint*sinps+cosp*cosps) + wp[i]*(cosp*sint*sinps-sinp*cosps)
+            out[i, 2] = up[i]*(-sint)    + vp[i]*(cost*sinp)                  + wp[i]*(cost*cosp)
+
+    return out
 
-    else: # from x'y'z' to xyz
-        u = up*cost*cosps + vp*(sinp*sint*cosps-cosp*sinps) + wp*(cosp*sint*cosps+sinp*sinps)
-        v = up*cost*sinps + vp*(sinp*sint*sinps+cosp*cosps) + wp*(cosp*sint*sinps-sinp*cosps)
-        w = up*(-sint)    + vp*(cost*sinp)                  + wp*(cost*cosp)
 
-    return np.array([u, v, w]).T
+def rotate_buoy_to_world(input_angles, euler_angles, iflag = False):
+    # Rotate from buoy frame to world frame
+    input_angles = np.asarray(input_angles, dtype=np.float64)
+    euler_angles = np.asarray(euler_angles, dtype=np.float64)
+    return _rotate_buoy_to_world(input_angles[:, 0], input_angles[:, 1], input_angles[:, 2],
+                                 euler_angles[:, 0], euler_angles[:, 1], euler_angles[:, 2], bool(iflag))
 
 
 def sonic(sonics, omegam, euler, uvwplat, R):
@@ -815,8 +1100,7 @@ def sonic(sonics, omegam, euler, uvwplat, R):
       INTEGRATED ACCELEROMETERS  
   """
 
-    Rvec = np.array(R * np.ones(omegam.shape))
-    uvwrot = np.cross(omegam,Rvec)
+    uvwrot = np.cross(omegam, np.asarray(R, dtype=np.float64))  # broadcast R over the samples
 
     uvw  = rotate_buoy_to_world(sonics + uvwrot, euler) + uvwplat
     uvwr = rotate_buoy_to_world(sonics + uvwrot, euler)
@@ -824,6 +1108,24 @@ def sonic(sonics, omegam, euler, uvwplat, R):
 
 
 
+@numba.njit('float64[:, ::1](float64[:], float64[:], float64[:], float64[:], float64[:])',
+            cache=True, fastmath=True, nogil=True)
+def _angle_update_matrix(up, vp, wp, p, t):
+    n = up.shape[0]
+    out = np.empty((n, 3))
+    for i in range(n):
+        sinp = np.sin(p[i])
+        cosp = np.cos(p[i])
+        tant = np.tan(t[i])
+        cost = np.cos(t[i])
+
+        out[i, 0] = up[i]  + vp[i]*sinp*tant + wp[i]*cosp*tant
+        out[i, 1] =  0     + vp[i]*cosp      - wp[i]*sinp
+        out[i, 2] =  0     + vp[i]*sinp/cost + wp[i]*cosp/cost
+
+    return out
+
+
 def get_angle_update_matrix(angular_rates, angles):
     """
     Function from EDDYCORR toolbox
@@ -831,19 +1133,10 @@ def get_angle_update_matrix(angular_rates, angles):
     as described in Edson et al. (1998) and Thwaites
     (1995) page 50.
     """
-    p  = angles[:, 0]
-    t  = angles[:, 1]
-    ps = angles[:, 2]
-
-    up = angular_rates[:, 0]
-    vp = angular_rates[:, 1]
-    wp = angular_rates[:, 2]
-
-    u = up  + vp*np.sin(p)*np.tan(t) + wp*np.cos(p)*np.tan(t)
-    v =  0  + vp*np.cos(p)           - wp*np.sin(p)
-    w =  0  + vp*np.sin(p)/np.cos(t) + wp*np.cos(p)/np.cos(t)
-
-    return np.array([u, v, w]).T
+    angular_rates = np.asarray(angular_rates, dtype=np.float64)
+    angles = np.asarray(angles, dtype=np.float64)
+    return _angle_update_matrix(angular_rates[:, 0], angular_rates[:, 1], angular_rates[:, 2],
+                                angles[:, 0], angles[:, 1])
 
 
 def get_euler_angles(ahi, bhi, sampling_frequency, accelerations, angular_rates, gyro, gravity, iterations = 5):
@@ -953,8 +1246,7 @@ def heave_calc(omegam, euler, accm, sampling_frequency, bhi, ahi, R, gravity):
       platform_disp - platform displacement at sensor location: [x, y, z]
     """
 
-    Rvec = np.array(R * np.ones(accm.shape))
-    uvwrot = np.cross(omegam, Rvec)
+    uvwrot = np.cross(omegam, np.asarray(R, dtype=np.float64))  # broadcast R over the samples
     uvwrot  = rotate_buoy_to_world(uvwrot, euler)
 
     acc = rotate_buoy_to_world(accm, euler) # first rotate
@@ -1011,26 +1303,34 @@ def get_platform_vel_pos(bhi, ahi, sampling_frequency, accm, euler, gravity):
     return (acc, lin_velocities, platform_disp)
 
 
-def alignwind(U):
-    # u,v,w are in platform coordinates;
-    # rotate motion corrected velocities into mean wind
-    # fluxes are relative to mean wind (for whole 20-minute segment)
-
+@numba.njit('Tuple((float64[:, ::1], float64, float64))(float64[:, :])', cache=True, fastmath=True, nogil=True)
+def _alignwind(U):
+    n = U.shape[0]
     Ub = np.mean(U[:, 0])
     Vb = np.mean(U[:, 1])
     Wb = np.mean(U[:, 2])
     Sb = np.sqrt(Ub**2 + Vb**2)
     beta  = np.arctan2(Wb,Sb)
     alpha = np.arctan2(Vb,Ub)
-    Ur =  U[:, 0]*np.cos(alpha)*np.cos(beta) + U[:, 1]*np.sin(alpha)*np.cos(beta) + U[:,2]*np.sin(beta)
-    Vr = -U[:, 0]*np.sin(alpha) + U[:, 1]*np.cos(alpha)
-    Wr = -U[:, 0]*np.cos(alpha)*np.sin(beta) - U[:, 1]*np.sin(alpha)*np.sin(beta) + U[:, 2]*np.cos(beta)
+    cosa = np.cos(alpha)
+    sina = np.sin(alpha)
+    cosb = np.cos(beta)
+    sinb = np.sin(beta)
+
+    u = np.empty((n, 3))
+    for i in range(n):
+        u[i, 0] =  U[i, 0]*cosa*cosb + U[i, 1]*sina*cosb + U[i, 2]*sinb
+        u[i, 1] = -U[i, 0]*sina + U[i, 1]*cosa
+        u[i, 2] = -U[i, 0]*cosa*sinb - U[i, 1]*sina*sinb + U[i, 2]*cosb
 
-    u=np.zeros(U.shape)
+    return u, alpha, beta
 
-    u[:, 0] = Ur
-    u[:, 1] = Vr
-    u[:, 2] = Wr
+
+def alignwind(U):
+    # u,v,w are in platform coordinates;
+    # rotate motion corrected velocities into mean wind
+    # fluxes are relative to mean wind (for whole 20-minute segment)
+    u, alpha, beta = _alignwind(np.asarray(U, dtype=np.float64))
 
     beta  = beta*180/np.pi
     alpha = alpha*180/np.pi
@@ -1,11 +1,18 @@
+import math
+import sys
+
+import numba
 import numpy as np
 import pandas as pd
 import xarray as xr
-from scipy.signal import buttord, butter, filtfilt, detrend, welch
-from scipy.fft import fft
+from functools import lru_cache, partial
+from scipy.signal import buttord, butter, sosfiltfilt, detrend
+from scipy.fft import rfft, rfftfreq
 from scipy.signal.windows import hann
-from scipy.integrate import cumulative_trapezoid
-from scipy.interpolate import interp1d
+from scipy.ndimage import uniform_filter1d
+from tqdm import tqdm
+
+from ooi_data_explorations.common import N_CORES, worker_pool
 
 
 ATTRS = {
@@ -134,7 +141,7 @@ ATTRS = {
 }
 
 
-def filter_coefficients(fs, fc, ludo=True):
+def filter_coefficients(fs, fc, ludo=True, output="ba"):
     """
     High-pass filter which retains real acceleration but removes drift
     
@@ -150,16 +157,40 @@ def filter_coefficients(fs, fc, ludo=True):
     NOTE: The scipy buttord function optimizes for the stopband, whereas
     MatLab Buttord optimizes for the passband, resulting in a -3 dB shift
     
+    The coefficients depend only on the inputs, so they are cached and
+    reused across all of the bursts in a deployment. Each call returns
+    copies of the cached arrays, so callers cannot modify the cache (the
+    scipy filters need writeable coefficient arrays, so the cached arrays
+    cannot be handed out read-only).
+    
     Parameters
     ----------
     fs: float, int
         Sampling frequency
     fc: float, int
+    
+    output: str, Default = "ba"
+        Type of output, either the numerator/denominator ("ba") or the
+        second-order sections ("sos") of the filter
         
     Returns
     -------
     b_high, a_high: array_like, array_like
         The numerator (b) and denominator (a) polynomilas of the IIR filter
+        (or, with output="sos", the array of second-order sections)
+    """
+    coeffs = _filter_coefficients(fs, fc, ludo, output)
+    if output == "ba":
+        return tuple(x.copy() for x in coeffs)
+    
+    return coeffs.copy()
+
+
+@lru_cache(maxsize=32)
+def _filter_coefficients(fs, fc, ludo, output):
+    """
+    Cached filter coefficients for filter_coefficients, returned read-only
+    as they are shared between calls.
     """
     n_freq = fs/2
     wp = fc/n_freq
@@ -170,9 +201,11 @@ def filter_coefficients(fs, fc, ludo=True):
         ws = 0.7*wp
         n, wn = buttord(wp, ws, 10, 25)
         
-    b_high, a_high = butter(n, wn, "high")
-    
-    return b_high, a_high
+    coeffs = butter(n, wn, "high", output=output)
+    for x in (coeffs if output == "ba" else (coeffs,)):
+        x.flags.writeable = False
+        
+    return coeffs
 
 
 def identify_samples(ds, threshold):
@@ -192,8 +225,10 @@ def identify_samples(ds, threshold):
         A numpy array the length of the input time dimension with the 
         sample interval number
     """
-    # First, get the difference of the time in seconds
-    dt = ds["time"].diff(dim="time").dt.seconds
+    # First, get the difference of the time in (whole) seconds, working on
+    # the underlying datetime64 values rather than through xarray
+    time = ds["time"].values
+    dt = np.diff(time) // np.timedelta64(1, "s")
     
     # Next, find where the gaps in the time series occur
     ends = np.where(dt > threshold)[0]
@@ -202,17 +237,9 @@ def identify_samples(ds, threshold):
     # right index exclusive
     ends = ends + 1
     
-    # Find the sampling groups
-    sample = np.zeros(ds.time.shape, dtype=int)
-    for i, end in enumerate(ends):
-        if i == 0:
-            start = 0
-        elif end == ends[-1]:
-            start = ends[i-1]
-            end = len(sample)+1
-        else:
-            start = ends[i-1]
-        sample[start:end] = i
+    # Find the sampling groups, numbering each run of samples between the gaps
+    bounds = np.concatenate(([0], ends, [time.size]))
+    sample = np.repeat(np.arange(len(bounds) - 1), np.diff(bounds)).astype(int)
         
     return sample
 
@@ -286,9 +313,7 @@ def zero_crossing(heave, fs):
     wave = np.zeros((len(crossing)-1, 4))
 
     # Get the max (crest) and min (trough) values between each crossing
-    for n in np.arange(0, len(crossing)-1, 1):
-        wave[n, 1] = np.max(z[crossing[n]:crossing[n+1]])
-        wave[n, 2] = -np.min(z[crossing[n]:crossing[n+1]])
+    _crests_troughs(z, crossing, wave)
 
     # Check the size of the wave and if no wave found do nothing
     if len(wave[:,1]) >= 1:
@@ -303,25 +328,7 @@ def zero_crossing(heave, fs):
         
         # Now remove wave which are too small by joining them to
         # adjacent waves
-        for idx, (crest, trough) in enumerate(wave[:,1:3]):
-            if crest < threshold:
-                if idx != 0:
-                    # Join the values to the preceding wave
-                    wave[idx-1, 1] = np.max(wave[idx-1:idx+1, 1])
-                    wave[idx-1, 2] = np.max(wave[idx-1:idx+1, 2])
-                    wave[idx-1, 3] = np.sum(wave[idx-1:idx+1, 3])
-                # Replace the values with NaNs
-                wave[idx, :] = np.nan
-            elif trough < threshold:
-                if idx+1 != len(wave):
-                    # Join the values to the next wave
-                    wave[idx, 1] = np.max(wave[idx:idx+2, 1])
-                    wave[idx, 2] = np.max(wave[idx:idx+2, 2])
-                    wave[idx, 3] = np.sum(wave[idx:idx+2, 3])
-                    # Replace the values with NaNs
-                    wave[idx+1, :] = np.nan
-                else:
-                    wave[idx, :] = np.nan
+        _join_small_waves(wave, threshold)
     
     # Drop the NaNs
     wave = wave[np.all(~np.isnan(wave), axis=1)]
@@ -354,6 +361,65 @@ def zero_crossing(heave, fs):
     return n, h_sig, T_sig, h_10, T_10, h_avg, T_avg
 
 
+@numba.njit(cache=True)
+def _crests_troughs(z, crossing, wave):
+    """
+    Numba kernel for zero_crossing. Fills in the crest (max) and trough
+    (negated min) of z between each pair of crossings, in a single pass
+    over each wave.
+    """
+    for n in range(crossing.shape[0] - 1):
+        crest = z[crossing[n]]
+        trough = z[crossing[n]]
+        for i in range(crossing[n] + 1, crossing[n+1]):
+            if z[i] > crest:
+                crest = z[i]
+            if z[i] < trough:
+                trough = z[i]
+        wave[n, 1] = crest
+        wave[n, 2] = -trough
+
+
+@numba.njit(cache=True)
+def _max2(a, b):
+    """NaN-propagating maximum of two values (as np.max of the pair)."""
+    if np.isnan(a) or np.isnan(b):
+        return np.nan
+    return a if a >= b else b
+
+
+@numba.njit(cache=True)
+def _join_small_waves(wave, threshold):
+    """
+    Numba kernel for zero_crossing. Joins the waves with a crest or trough
+    below the threshold to the preceding or following wave, respectively,
+    and replaces the joined waves with NaNs. Works in place, in order, so a
+    wave already joined (NaN) is seen as such by the later waves.
+    """
+    nw = wave.shape[0]
+    for idx in range(nw):
+        crest = wave[idx, 1]
+        trough = wave[idx, 2]
+        if crest < threshold:
+            if idx != 0:
+                # Join the values to the preceding wave
+                wave[idx-1, 1] = _max2(wave[idx-1, 1], wave[idx, 1])
+                wave[idx-1, 2] = _max2(wave[idx-1, 2], wave[idx, 2])
+                wave[idx-1, 3] = wave[idx-1, 3] + wave[idx, 3]
+            # Replace the values with NaNs
+            wave[idx, :] = np.nan
+        elif trough < threshold:
+            if idx+1 != nw:
+                # Join the values to the next wave
+                wave[idx, 1] = _max2(wave[idx, 1], wave[idx+1, 1])
+                wave[idx, 2] = _max2(wave[idx, 2], wave[idx+1, 2])
+                wave[idx, 3] = wave[idx, 3] + wave[idx+1, 3]
+                # Replace the values with NaNs
+                wave[idx+1, :] = np.nan
+            else:
+                wave[idx, :] = np.nan
+
+
 def non_directional_statistics(heave, fs, npt):
     """
     Calculate the wave statistics from the wave time series.
@@ -393,14 +459,13 @@ def non_directional_statistics(heave, fs, npt):
     Hsig = 4*np.std(heave) 
     Havg = np.mean(heave)  # Not actually average wave height
     
-    bw = np.ones(5)/5
-    aw = 1
-    
     # Calculate the significant wave period from the spectral density
     if Hsig > 0.2:
-        [fr, wxx] = welch(heave, fs, window=hann(npt), nfft=npt, noverlap=0, detrend=False)
+        fr, wxx = _periodogram(heave, fs, npt)
         wxx[0] = wxx[1]
-        wxxf = filtfilt(bw, aw, wxx)
+        # Smooth with a 5-point moving average run twice, the same
+        # triangular kernel as a forward-backward filtfilt of the average
+        wxxf = uniform_filter1d(uniform_filter1d(wxx, size=5), size=5)
         i = np.where(fr<0.01)[0]
         wxxf[i] = 1E-7
         i = np.where(wxxf == np.max(wxxf))[0]
@@ -414,6 +479,39 @@ def non_directional_statistics(heave, fs, npt):
     return Hsig, Havg, Tsig, Tavg
 
 
+@lru_cache(maxsize=4)
+def _hann(npt):
+    """
+    Hann window of length npt, cached since npt is normally fixed for all
+    of the bursts in a deployment. The window is returned read-only as the
+    same array is shared between calls.
+    """
+    w = hann(npt)
+    w.flags.writeable = False
+    return w
+
+
+def _periodogram(x, fs, npt):
+    """
+    One-sided power spectral density from the average of non-overlapping,
+    Hann windowed segments of length npt. Equivalent to scipy.signal.welch
+    with noverlap=0 and detrend=False, but computed directly from a single
+    batched rfft.
+    """
+    w = _hann(npt)
+    nseg = len(x) // npt
+    X = rfft(x[:nseg * npt].reshape(nseg, npt) * w, axis=1, workers=numba.get_num_threads())
+    pxx = np.mean(X.real**2 + X.imag**2, axis=0) / (fs * np.sum(w * w))
+    
+    # Double everything but the DC and (for an even npt) Nyquist terms
+    if npt % 2:
+        pxx[1:] *= 2
+    else:
+        pxx[1:-1] *= 2
+        
+    return rfftfreq(npt, 1/fs), pxx
+
+
 def wave_period(heave, fs):
     """
     Compute average wave period using the zero-crossing method
@@ -440,15 +538,27 @@ def wave_period(heave, fs):
     heave = detrend(heave)
     n=len(heave)
     T=(n-1)/fs
-    sheave = np.sign(heave)
-    sw1 = sheave[0:len(heave)-1]
-    sw2 = sheave[1:len(heave)]
-    i = np.where(sw1 != sw2)[0]
-    fm = len(i)/2/T
+    fm = _count_sign_changes(heave)/2/T
     tm = 1/fm
     return tm
 
 
+@numba.njit(cache=True)
+def _count_sign_changes(x):
+    """
+    Count the changes in sign (as given by np.sign) between consecutive
+    values in a single pass, without building the intermediate sign arrays.
+    """
+    count = 0
+    prev = np.sign(x[0])
+    for i in range(1, x.shape[0]):
+        s = np.sign(x[i])
+        if s != prev:
+            count += 1
+        prev = s
+    return count
+
+
 def updater(IN, ANGLES):
     """
     Computes the angular update matrix described in Edson et al (1998) and Thwaites (1995)
@@ -482,14 +592,55 @@ def updater(IN, ANGLES):
     vp = IN[1,:]
     wp = IN[2,:]
     
-    u = up + vp*np.sin(p)*np.tan(t) + wp*np.cos(p)*np.tan(t)
-    v = 0  + vp*np.cos(p)           - wp*np.sin(p)
-    w = 0  + vp*np.sin(p)/np.cos(t) + wp*np.cos(p)/np.cos(t)
+    # Compute the trig functions of the angles once
+    sp = np.sin(p)
+    cp = np.cos(p)
+    ct = np.cos(t)
+    tt = np.sin(t) / ct
+    
+    # Write the rows straight into the output rather than stacking them,
+    # sharing the common term vp*sin(phi) + wp*cos(phi) between u and w
+    OUT = np.empty(IN.shape)
+    swc = vp*sp
+    swc += wp*cp
     
-    return np.vstack([u, v, w])
+    np.multiply(swc, tt, out=OUT[0])    # u = up + vp*sp*tt + wp*cp*tt
+    OUT[0] += up
+    np.multiply(vp, cp, out=OUT[1])     # v = vp*cp - wp*sp
+    OUT[1] -= wp*sp
+    np.divide(swc, ct, out=OUT[2])      # w = vp*sp/ct + wp*cp/ct
+    
+    return OUT
 
 
-def euler_angles(ahi, bhi, fs, accm, ratem, gyro, gravity, iters=5):
+def _cumint(x, dx):
+    """
+    Cumulative trapezoidal integration along the last axis, starting from
+    zero. Matches cumulative_trapezoid(x, dx=dx, initial=0), but runs the
+    running sum in a compiled loop without any intermediate arrays.
+    """
+    x = np.asarray(x, dtype=float)
+    out = np.empty_like(x)
+    n = x.shape[-1]
+    _cumint_rows(x.reshape(-1, n), 0.5 * dx, out.reshape(-1, n))
+    return out
+
+
+@numba.njit(cache=True)
+def _cumint_rows(x, half_dx, out):
+    """
+    Numba kernel for _cumint. Integrates each row of x in a single pass,
+    carrying the running total from one sample to the next.
+    """
+    for r in range(x.shape[0]):
+        total = 0.0
+        out[r, 0] = 0.0
+        for i in range(1, x.shape[1]):
+            total += (x[r, i-1] + x[r, i]) * half_dx
+            out[r, i] = total
+
+
+def euler_angles(sos, fs, accm, ratem, gyro, gravity, iters=5):
     """
     Derive the euler angles from the accelerometers and rate sensors.
     
@@ -498,10 +649,8 @@ def euler_angles(ahi, bhi, fs, accm, ratem, gyro, gravity, iters=5):
         
     Parameters
     ----------
-    ahi: array_like
-        The filter coefficients a
-    bhi: array_like
-        The filter coefficients b
+    sos: array_like
+        The second-order sections of the high-pass filter
     fs: float
         The sample frequency
     accm: array_like
@@ -538,50 +687,53 @@ def euler_angles(ahi, bhi, fs, accm, ratem, gyro, gravity, iters=5):
     # Slow roll from gravity effects on horizontal accelerations
     # Low pass filter since high frequency horizontal accelerations may be real
     
+    # Scale the horizontal accelerations by gravity once, rather than
+    # separately for each of the terms below
+    acc_g = accm[0:2, :] / gravity
+    
     # PITCH
     # Use small angles
-    theta_th = np.minimum(-accm[0, :] / gravity, 1)
+    theta_th = np.minimum(-acc_g[0], 1)
     theta = theta_th
     
     # Remove freefall values
     ind = np.where(np.abs(accm[0, :]) < gravity)
-    theta[ind] = np.arcsin(-accm[0, ind] / gravity) 
+    theta[ind] = np.arcsin(-acc_g[0, ind]) 
     
     # Calculate the slow angles
-    theta_slow = theta - filtfilt(bhi, ahi, theta)
+    theta_slow = theta - sosfiltfilt(sos, theta)
     
     # ROLL
     # Use small angles
-    phi_th = accm[1] / gravity
+    phi_th = acc_g[1]
     phi = phi_th
     
     # Find well-behaved angles
-    ind = np.where(np.abs(accm[1] / gravity / np.cos(theta_slow)) < 1)[0]
-    phi[ind] = np.arcsin(accm[1, ind] / gravity / np.cos(theta_slow[ind]))
+    sin_phi = acc_g[1] / np.cos(theta_slow)
+    ind = np.where(np.abs(sin_phi) < 1)[0]
+    phi[ind] = np.arcsin(sin_phi[ind])
     
     # Filter the roll angles
-    phi_slow = phi - filtfilt(bhi, ahi, phi)
+    phi_slow = phi - sosfiltfilt(sos, phi)
     
     # YAW
-    psi_slow = gyro[0] - filtfilt(bhi,ahi,gyro[0]);
+    psi_slow = gyro[0] - sosfiltfilt(sos, gyro[0])
     
     # ==================================================================
     # EULER ANGLES
     # Calculate the euler angles, starting with the slow angles as first guess
-    euler = np.vstack([phi_slow, theta_slow, psi_slow])
+    slow = np.vstack([phi_slow, theta_slow, psi_slow])
+    euler = slow
     rates = updater(ratem, euler)
     
     # Recalculate the euler angles by adding the integrated rates to the
-    # slow angles, updating the euler angles, and repeating for iters
+    # slow angles, updating the euler angles, and repeating for iters. All
+    # three axes are integrated and filtered together, and removing the
+    # mean is the same as a constant detrend.
     for i in np.arange(0, iters):
-        phi = phi_slow + filtfilt(bhi, ahi, 1/fs*cumulative_trapezoid(rates[0, :], initial=0))
-        theta = theta_slow + filtfilt(bhi, ahi, 1/fs*cumulative_trapezoid(rates[1, :], initial=0))
-        psi = psi_slow + filtfilt(bhi, ahi, 1/fs*cumulative_trapezoid(rates[2, :], initial=0))
-        euler = np.vstack([phi, theta, psi])
+        euler = slow + sosfiltfilt(sos, _cumint(rates, 1/fs), axis=1)
         rates = updater(ratem, euler)
-        rates[0] = detrend(rates[0], type='constant')
-        rates[1] = detrend(rates[1], type='constant')
-        rates[2] = detrend(rates[2], type='constant')
+        rates -= rates.mean(axis=1, keepdims=True)
         
     return euler, ratem
 
@@ -625,34 +777,44 @@ def rotate(IN, ANGLES, IFLAG=0):
 
     """
     
-    # Grab the Euler angles
-    phi = ANGLES[0,:]
-    theta = ANGLES[1,:]
-    psi = ANGLES[2,:]
-    
-    # Get the input vector components
-    up = IN[0,:]
-    vp = IN[1,:]
-    wp = IN[2,:]
+    IN = np.asarray(IN, dtype=np.float64)
+    ANGLES = np.asarray(ANGLES, dtype=np.float64)
     
-    # Perform rotation
-    # If True: xyz -> x'y'z'
-    if IFLAG == 1:
-        u = up * np.cos(theta) * np.cos(psi) + vp * np.cos(theta)*np.sin(psi) - wp * np.sin(theta)
-        v = up * (np.sin(phi) * np.sin(theta) * np.cos(psi) - np.cos(phi) * np.sin(psi)) + vp * (np.sin(phi) * np.sin(theta) * np.sin(psi) + np.cos(phi) * np.cos(psi)) + wp * (np.cos(theta) * np.sin(phi))
-        w = up * (np.cos(phi) * np.sin(theta) * np.cos(psi) + np.sin(phi) * np.sin(psi)) + vp * (np.cos(phi) * np.sin(theta) * np.sin(psi) - np.sin(phi) * np.cos(psi)) + wp * (np.cos(theta) * np.cos(phi))
-    # If False: x'y'z' -> xyz
-    else:
-        u = up * np.cos(theta) * np.cos(psi) + vp * (np.sin(phi) * np.sin(theta) * np.cos(psi) - np.cos(phi) * np.sin(psi)) + wp * (np.cos(phi) * np.sin(theta) * np.cos(psi) + np.sin(phi) * np.sin(psi))
-        v = up * np.cos(theta) * np.sin(psi) + vp * (np.sin(phi) * np.sin(theta) * np.sin(psi) + np.cos(phi) * np.cos(psi)) + wp * (np.cos(phi) * np.sin(theta) * np.sin(psi) - np.sin(phi) * np.cos(psi))
-        w = up * (-np.sin(theta)) + vp * (np.cos(theta) * np.sin(phi)) + wp * (np.cos(theta) * np.cos(phi));
-        
-    # Return the rotated vector
-    OUT = np.vstack((u, v, w))
+    # Perform the rotation in a single pass over the samples, writing
+    # straight into the output array
+    OUT = np.empty((3, IN.shape[1]))
+    _rotate(IN[0], IN[1], IN[2], ANGLES[0], ANGLES[1], ANGLES[2], IFLAG == 1, OUT)
     return OUT
 
 
-def heave(omegam, euler, accm, fs, bhi, ahi, R, gravity):
+@numba.njit(parallel=True, fastmath=True, cache=True)
+def _rotate(up, vp, wp, phi, theta, psi, iflag, out):
+    """
+    Numba kernel for rotate. Each sample is rotated independently, so the
+    loop over the samples is split across threads.
+    """
+    for i in numba.prange(up.shape[0]):
+        # Compute the trig functions of the angles once
+        sp = np.sin(phi[i])
+        cp = np.cos(phi[i])
+        st = np.sin(theta[i])
+        ct = np.cos(theta[i])
+        sps = np.sin(psi[i])
+        cps = np.cos(psi[i])
+        
+        # If True: xyz -> x'y'z'
+        if iflag:
+            out[0, i] = up[i] * ct * cps + vp[i] * ct * sps - wp[i] * st
+            out[1, i] = up[i] * (sp * st * cps - cp * sps) + vp[i] * (sp * st * sps + cp * cps) + wp[i] * (ct * sp)
+            out[2, i] = up[i] * (cp * st * cps + sp * sps) + vp[i] * (cp * st * sps - sp * cps) + wp[i] * (ct * cp)
+        # If False: x'y'z' -> xyz
+        else:
+            out[0, i] = up[i] * ct * cps + vp[i] * (sp * st * cps - cp * sps) + wp[i] * (cp * st * cps + sp * sps)
+            out[1, i] = up[i] * ct * sps + vp[i] * (sp * st * sps + cp * cps) + wp[i] * (cp * st * sps - sp * cps)
+            out[2, i] = up[i] * (-st) + vp[i] * (ct * sp) + wp[i] * (ct * cp)
+
+
+def heave(omegam, euler, accm, fs, sos, R, gravity):
     """
     Correct components for platform motion and orientation
     
@@ -664,6 +826,10 @@ def heave(omegam, euler, accm, fs, bhi, ahi, R, gravity):
         A (3 x n) array of euler angles (phi, theta, psi)
     accm: array_like
         A (3 x n) array of platform accelerations
+    fs: float
+        The sample frequency
+    sos: array_like
+        The second-order sections of the high-pass filter
     R: array_like
         Vector distance from motion pack to wave sensor
         
@@ -688,18 +854,15 @@ def heave(omegam, euler, accm, fs, bhi, ahi, R, gravity):
     acc = rotate(accm, euler, 0)
     acc[2, :] = acc[2, :] - gravity
     
-    motion = np.ones(acc.shape)
-    uvw_plat = np.ones(acc.shape)
-    for i in range(0, 3):
-        acc[i, :] = filtfilt(bhi, ahi, acc[i, :])
-        motion[i, :] = cumulative_trapezoid(acc[i, :], initial=0) / fs + uvw_rot[i, :]
-        uvw_plat[i, :] = filtfilt(bhi, ahi, motion[i, :])
+    # Filter and integrate the accelerations to get the velocities, working
+    # on all three components at once
+    acc = sosfiltfilt(sos, acc, axis=1)
+    motion = _cumint(acc, 1/fs) + uvw_rot
+    uvw_plat = sosfiltfilt(sos, motion, axis=1)
     
     # Integrate again to get the displacements
-    xyz_plat = np.ones(uvw_plat.shape)
-    for i in range(0, 3):
-        xyz_plat[i, :] = cumulative_trapezoid(uvw_plat[i, :], initial=0) / fs
-        xyz_plat[i, :] = filtfilt(bhi, ahi, xyz_plat[i, :])
+    xyz_plat = _cumint(uvw_plat, 1/fs)
+    xyz_plat = sosfiltfilt(sos, xyz_plat, axis=1)
         
     return uvw_plat, xyz_plat
 
@@ -743,27 +906,30 @@ def uvw_xyz(gyro, platform, angular_rates, fs, f_cutoff=1/30, com_offset=[0, 0,
     Edson, Jim. 2023. Motion Calculations Toolbox. [Software: MatLab]
     """
     # 30 second cutoff period for waves
-    bhiwaves, ahiwaves = filter_coefficients(fs, f_cutoff)
+    # (as second-order sections, which are better conditioned than the
+    # transfer function coefficients for filters with low cutoffs)
+    sos_waves = filter_coefficients(fs, f_cutoff, output="sos")
     
     #  despike the data
     platform, bad_platform = despike(platform)
     ang_rate, bad_ang_rate = despike(angular_rates)
 
-    # Calculate the compass offset angles
-    gx = np.cos(gyro)
-    gy = np.sin(gyro)
-
-    # Remove spikes from the compass offset angles
-    [gx, bad_gx] = despike(gx)
-    [gy, bad_gy] = despike(gy)
-
-    # Smooth the compass angles
-    g_smooth = np.arctan2(gy, gx)
-    gyro = g_smooth
+    # Remove spikes from the compass angles, working on the unwrapped angles
+    # so the jumps at +/-pi are not mistaken for spikes, then wrap back
+    # into [-pi, pi). Missing angles are skipped over when unwrapping, as
+    # a NaN would otherwise carry through the rest of the burst; despike
+    # then fills them with the nearest good value
+    gyro = np.array(gyro, dtype=float)
+    valid = ~np.isnan(gyro)
+    gyro[valid] = np.unwrap(gyro[valid])
+    gyro, bad_gyro = despike(gyro)
+    np.add(gyro, np.pi, out=gyro)
+    np.mod(gyro, 2*np.pi, out=gyro)
+    np.subtract(gyro, np.pi, out=gyro)
 
     # Calculate the Euler angles, velocities, and displacements
-    euler, dr = euler_angles(ahiwaves, bhiwaves, fs, platform, ang_rate, gyro, G)
-    uvw, xyz = heave(dr, euler, platform, fs, bhiwaves, ahiwaves, com_offset, G)
+    euler, dr = euler_angles(sos_waves, fs, platform, ang_rate, gyro, G)
+    uvw, xyz = heave(dr, euler, platform, fs, sos_waves, com_offset, G)
     
     return uvw, xyz
 
@@ -787,7 +953,7 @@ def despike(data, n_std=4, iters=3):
     -------
     data: array_like
         A two-dimensional array of the data despiked. Identified bad
-        data points have been filled via linearly interpolation.
+        data points have been filled with the nearest good value.
     bad: array_like
         The bad data points
 
@@ -801,24 +967,35 @@ def despike(data, n_std=4, iters=3):
     
     # Get the median and standard deviations
     rows, n = data.shape
-    t = np.arange(n)
     bad = []
     # Iterate over each row of the column separately
     for row in np.arange(rows):
         # Run three iterations to remove all possible spikes
         for i in np.arange(iters):
-            # Calculate the median and standard deviations
-            median = np.nanmedian(data[row, :])
-            std = np.nanstd(data[row, :])
+            # Calculate the median and standard deviations, dropping any NaNs
+            # once up front rather than in both of the nan-aware reductions
+            valid = ~np.isnan(data[row, :])
+            values = data[row, valid]
+            median = np.median(values)
+            std = values.std()
             
             # Find where the data is out-of-range
-            good = np.where((data[row,:] < median+n_std*std) & (data[row, :] > median-n_std*std) & (~np.isnan(data[row, :])))[0]
+            mask = (data[row,:] < median+n_std*std) & (data[row, :] > median-n_std*std) & valid
+            good = np.flatnonzero(mask)
+            bad_idx = np.flatnonzero(~mask)
             if i == 0:
                 n_bad = n - len(good)
+            if len(bad_idx) == 0:
+                # Nothing to fill, so the remaining passes would see the
+                # same data and find the same (empty) set of spikes
+                break
             if len(good) > 0:
-                # Now use the good data points to linearly interpolate to fill in the bad data points
-                ft = interp1d(t[good], data[row, good], kind="nearest", fill_value="extrapolate")
-                data[row, :] = ft(t)
+                # Fill the bad data points with the nearest good data point,
+                # splitting at the midpoints between good points (ties go to
+                # the earlier point, same as interp1d with kind="nearest")
+                mid = (good[1:] + good[:-1]) / 2
+                nearest = good[np.searchsorted(mid, bad_idx, side='left')]
+                data[row, bad_idx] = data[row, nearest]
                 
         # Save the total number of bad points
         bad.append(n_bad)
@@ -847,13 +1024,8 @@ def arctan3(y, x):
     Beardsley, Bob. 1999. AIR SEA Toolbox. Ver. 2.0. [Software: MatLab]
 
     """
-    theta = np.arctan2(y, x)
-    theta = np.atleast_1d(theta)
-    index = np.where(theta < 0)[0]
-    if len(index) > 0:
-        theta[index] = theta[index] + 2*np.pi
-    
-    return theta
+    theta = np.atleast_1d(np.arctan2(y, x))
+    return np.mod(theta, 2*np.pi)
 
 
 def log_avg(f, s, n):
@@ -888,6 +1060,20 @@ def log_avg(f, s, n):
     Gordon, Lee. 2001. NortekUSA LLC. [Software: MatLab]
     """
     
+    F, dF, Ns, Ne = _log_bands(f, n)
+    
+    # Calculate the averaged spectrum from the band sums
+    S = np.add.reduceat(s, Ns, axis=-1) / (Ne - Ns + 1)
+    
+    return F, S, dF, Ns, Ne
+
+
+def _log_bands(f, n):
+    """
+    Band-centered frequencies, bandwidths and start/end indices of the n
+    log-spaced frequency bands used by log_avg. These depend only on the
+    frequencies, not on the spectrum being averaged.
+    """
     lf = np.log(f)
     
     # Log frequency increment
@@ -898,20 +1084,37 @@ def log_avg(f, s, n):
     AA = np.where(np.diff(NDX) > 0)[0]
     AA = np.concatenate([AA, np.ones(1)*(len(f)-1)]).astype(int)
 
-    # Calculate the averaged spectrum and frequencies
-    Cs = np.cumsum(s)
-    Cf = np.cumsum(f)
-    F = np.concatenate([np.array([Cf[AA[0]]]), np.diff(Cf[AA])]) / np.concatenate([np.array([AA[0]+1]), np.diff(AA)])
-    S = np.concatenate([np.array([Cs[AA[0]]]), np.diff(Cs[AA])]) / np.concatenate([np.array([AA[0]+1]), np.diff(AA)])
-
-    # Calculate the frequency bandwidths
-    dF = np.concatenate([np.array([AA[0]+1]), np.diff(AA)]) * (f[9]-f[8])
-
-    # Get the start and end indices of each band
+    # Get the start and end indices, and the number of points, of each band
     Ns = np.concatenate([np.array([0]), AA[0:-1]+1])
     Ne = AA
+    counts = Ne - Ns + 1
     
-    return F, S, dF, Ns, Ne
+    # Calculate the averaged frequencies from the band sums
+    F = np.add.reduceat(f, Ns) / counts
+
+    # Calculate the frequency bandwidths from the (uniform) frequency spacing
+    df = f[1] - f[0]
+    dF = counts * df
+    
+    return F, dF, Ns, Ne
+
+
+@lru_cache(maxsize=8)
+def _spectra_bands(m, dt, nF):
+    """
+    Frequencies and log bands for the spectra from an m-point FFT. The
+    burst length, and so m, is normally the same for every burst in a
+    deployment, so these are cached and computed once rather than for
+    every burst and spectrum. The arrays are returned read-only as they
+    are shared between calls.
+    """
+    # Frequency array up to the Nyquist frequency
+    f = np.arange(1, m//2 + 1) / (m*dt)
+    F, dF, Ns, Ne = _log_bands(f, nF)
+    for x in (f, F, dF, Ns, Ne):
+        x.flags.writeable = False
+        
+    return f, F, dF, Ns, Ne
 
 
 def wave_spectra(u, v, p, dt, nF, hp, hv, params=[0.03, 200, 0.1, 0]):
@@ -992,42 +1195,36 @@ def wave_spectra(u, v, p, dt, nF, hp, hv, params=[0.03, 200, 0.1, 0]):
         v = v[:-1]
         p = p[:-1]
         n = len(p)
-    Dt = n*dt
     
-    # Frequency array up to the Nyquist frequency
-    f = np.arange(1, (n+1)/2) / Dt
-    
-    # Compute the spectrum from velocity and pressure
-    u_fft = fft(u)
-    v_fft = fft(v)
-    p_fft = fft(p)
-    
-    # Compute power spectrum and ignore zero frequency
-    u_power = abs(u_fft[1:int((n/2)+1)]**2)
-    v_power = abs(v_fft[1:int((n/2)+1)]**2)
-    p_power = abs(p_fft[1:int((n/2)+1)]**2)
-    
-    # Scale power spectrum
-    u_power = (u_power*2)/(n**2)/f[0]
-    v_power = (v_power*2)/(n**2)/f[0]
-    p_power = (p_power*2)/(n**2)/f[0]
-
-    # Scale the cross-spectra and limit frequencies
-    pu_power = np.real((p_fft*np.conj(u_fft)) * 2 / (n**2) / f[0])
-    pu_power = pu_power[1:int((n/2)+1)]
-    pv_power = np.real((p_fft*np.conj(v_fft)) * 2 / (n**2) / f[0])
-    pv_power = pv_power[1:int((n/2)+1)]
-    uv_power = np.real((u_fft*np.conj(v_fft)) * 2 / (n**2) / f[0])
-    uv_power = uv_power[1:int((n/2)+1)]
-    
-    # Average the power spectrums into log bands
-    F, Cuu, _, _, _ = log_avg(f, u_power, nF)
-    F, Cvv, _, _, _ = log_avg(f, v_power, nF)
-    F, Cpp, _, _, _ = log_avg(f, p_power, nF)
-    F, Cpu, _, _, _ = log_avg(f, pu_power, nF)
-    F, Cpv, dF, Ns, Ne = log_avg(f, pv_power, nF)
-    F, Cuv, _, _, _ = log_avg(f, uv_power, nF)
-    dof = 2*(Ne-Ns+1)
+    # Frequency array up to the Nyquist frequency, and the log bands the
+    # spectra are averaged into
+    f, F, dF, Ns, Ne = _spectra_bands(n, dt, nF)
+    
+    # Compute the one-sided spectrum from velocity and pressure, ignoring
+    # the zero frequency (the inputs are real, so the negative frequencies
+    # are redundant and rfft skips computing them). The three series are
+    # transformed together as rows of a single array, letting scipy share
+    # the FFT plan and spread the rows across the available cores.
+    uvp_fft = rfft(np.vstack([u, v, p]), axis=1, workers=numba.get_num_threads())[:, 1:]
+    re = uvp_fft.real
+    im = uvp_fft.imag
+    
+    # Compute and scale the power spectrum
+    # (the spectra are collected as the rows of a single array)
+    scale = 2 / (n**2) / f[0]
+    power = np.empty((6, len(f)))
+    np.multiply(re*re + im*im, scale, out=power[0:3])
+
+    # Scale the cross-spectra, using real(a*conj(b)) = a.re*b.re + a.im*b.im
+    # to skip forming the full complex products
+    np.multiply(re[2]*re[0] + im[2]*im[0], scale, out=power[3])
+    np.multiply(re[2]*re[1] + im[2]*im[1], scale, out=power[4])
+    np.multiply(re[0]*re[1] + im[0]*im[1], scale, out=power[5])
+    
+    # Average the power spectrums into log bands, all at once
+    counts = Ne - Ns + 1
+    Cuu, Cvv, Cpp, Cpu, Cpv, Cuv = np.add.reduceat(power, Ns, axis=1) / counts
+    dof = 2*counts
     
     # Find low-frequency cutoff
     aa = np.where(F > lf_cutoff)[0]
@@ -1144,36 +1341,40 @@ def magnetometer(data):
     """
     # ----------------------------------------------------
     # First, grab the xyz magnetometer data
+    # (only x and y are needed for the headings)
     magx = data.mopak_magx.values
     magy = data.mopak_magy.values
-    magz = data.mopak_magz.values
-    
-    # Put the data into a matrix
-    magnet = np.vstack([magx, magy, magz])
     
     # ----------------------------------------------------
     # Get headings and account for z is positive downwards
     # Account for magnetic to true north misalignment
     dev = -10*np.pi/180
-    magnet[0] = magnet[0]
-    magnet[1] = -1*magnet[1]
-    magnet[2] = -1*magnet[2]
     
-    # Calculate the compass directions in radians
-    compass = np.arctan2(magnet[1], magnet[0]) + dev
-
-    # Correct for values that fall outside real ranges
-    mask = compass > np.pi
-    compass[mask] = compass[mask] - np.pi
-    mask = compass < -1*np.pi
-    compass[mask] = compass[mask] + np.pi
-
-    # Reorient to account for z-direction
-    compass = -1*compass
+    # Calculate the compass directions in radians, correcting for values
+    # that fall outside real ranges and reorienting to account for the
+    # z-direction, all in a single pass over the data
+    compass = np.empty(magx.shape)
+    _compass(magx, magy, dev, compass)
     
     return compass
 
 
+@numba.njit(parallel=True, fastmath=True, cache=True)
+def _compass(magx, magy, dev, out):
+    """
+    Numba kernel for magnetometer. Computes the heading from the x and
+    (sign-flipped) y magnetometer components, wraps it back into [-pi, pi]
+    and flips the sign for the z-direction.
+    """
+    for i in numba.prange(magx.shape[0]):
+        c = np.arctan2(-magy[i], magx[i]) + dev
+        if c > np.pi:
+            c -= 2*np.pi
+        elif c < -np.pi:
+            c += 2*np.pi
+        out[i] = -c
+
+
 def accelerations(data):
     """
     Process and clean the xyz accelerations
@@ -1209,24 +1410,30 @@ def accelerations(data):
     ay = data.mopak_accely.values
     az = data.mopak_accelz.values
 
-    # Put the accelerations into a (3 x n) array
-    platform = np.vstack([ax, ay, az])
-    
-    # Reorient y & z positions (z is positive down)
-    platform[0] = platform[0]
-    platform[1] = -1*platform[1]
-    platform[2] = -1*platform[2]
-    
-    # Calculate the local gravity values
-    gravxyz = np.mean(platform.transpose(), axis=0)
-    gravity = np.sqrt(np.sum(gravxyz**2))
+    # Put the accelerations into a (3 x n) array, reorienting the y & z
+    # positions (z is positive down) and adjusting the accelerations to be
+    # in m/s^2 as each row is written
+    platform = _stack3(ax, ay, az, signs=(1, -1, -1), scale=G)
     
-    # Adjust the accelerations to be in m/s^2
-    platform = platform*G
+    # Calculate the local gravity values (in g-force units)
+    gravxyz = platform.mean(axis=1) / G
+    gravity = math.hypot(*gravxyz)
     
     return platform, gravity
 
     
+def _stack3(x, y, z, signs=(1, 1, 1), scale=1.0):
+    """
+    Stack the x, y, z components into a C-contiguous (3 x n) array of
+    floats, applying the sign and scale factors to each row as it is
+    written rather than in separate passes over a stacked copy.
+    """
+    out = np.empty((3, np.size(x)))
+    for row, values, sign in zip(out, (x, y, z), signs):
+        np.multiply(values, sign*scale, out=row)
+    return out
+
+
 def angular_rates(data):
     """
     Process and clean the angular rates
@@ -1254,13 +1461,9 @@ def angular_rates(data):
     dy = data.mopak_ang_ratey.values
     dz = data.mopak_ang_ratez.values
 
-    # Put into a matrix
-    angular_rate = np.vstack([dx, dy, dz])
-    
-    # Reorient the y and z positions (right-hand-rule)
-    angular_rate[0] = angular_rate[0]
-    angular_rate[1] = -1*angular_rate[1]
-    angular_rate[2] = -1*angular_rate[2]
+    # Put into a matrix, reorienting the y and z positions (right-hand-rule)
+    # as each row is written
+    angular_rate = _stack3(dx, dy, dz, signs=(1, -1, -1))
     
     return angular_rate
 
@@ -1310,8 +1513,9 @@ def build_dataset(ds, number_zero_crossings, significant_wave_height, significan
     sample_start_time: array_like
         Either an array of datetime strings or datetime objects that correspond
         to the start of each sampling period
-    deployment: int, float, str
-        The deployment number of the dataset being processed
+    deployment: int, float, str, array_like
+        The deployment number of the dataset being processed, or an array
+        with the deployment number of each sample
         
     Returns
     -------
@@ -1334,12 +1538,12 @@ def build_dataset(ds, number_zero_crossings, significant_wave_height, significan
     significant_wave_height_puv = np.atleast_1d(significant_wave_height_puv)
     sample_start_time = np.atleast_1d(sample_start_time)
     
-    # Check that the sample_start_times are datetime objects
-    sample_start_time = sample_start_time.astype("datetime64[ns]")
+    # Check that the sample_start_times are datetime objects (without a copy
+    # if they already are)
+    sample_start_time = sample_start_time.astype("datetime64[ns]", copy=False)
     
     # Build an array of the deployment number
-    deployment = np.ones(sample_start_time.shape)*int(deployment)
-    deployment = deployment.astype("int")
+    deployment = np.broadcast_to(np.asarray(deployment, dtype=int), sample_start_time.shape).copy()
     
     # Create a dictionary object of the data variables
     data_vars = dict(
@@ -1396,6 +1600,11 @@ def calculate_wave_statistics(ds, n_std, fs, com_offset=[0, 0, 0.5], f_cutoff=1/
     the bulk wave statistics are calculated using a zero downcrossing algorithm. The directional
     statistics are derived from the wave power and cross-spectra. 
     
+    The wave samples are independent, so they are processed in parallel when there are more
+    than a few of them and at least two cores available (N_CORES). The worker processes are
+    spawned, re-importing the calling script, so scripts calling this function must do so
+    from within an ``if __name__ == '__main__':`` block.
+    
     Parameters
     ----------
     ds: xarray.DataSet
@@ -1501,22 +1710,7 @@ def calculate_wave_statistics(ds, n_std, fs, com_offset=[0, 0, 0.5], f_cutoff=1/
     Deg_rate = angular_rates(ds)
     
     # --------------------------------------------------------------------
-    # Calculate the wave statistics by iterating through each wave sample
-    # (Note: can probably speed this portion up using Dask)
-    number_zero_crossings = []
-    significant_wave_height = []
-    significant_wave_period = []
-    wave_height_10 = []
-    wave_period_10 = []
-    peak_wave_period = []
-    mean_wave_height = []
-    mean_wave_period = []
-    peak_wave_direction_puv = []
-    peak_wave_spread_puv = []
-    peak_wave_period_puv = []
-    significant_wave_height_puv = []
-    deployment = []
-    sample_start_time = []
+    # Calculate the wave statistics for each wave sample
 
     # Number of iterations
     iters = 5
@@ -1524,51 +1718,104 @@ def calculate_wave_statistics(ds, n_std, fs, com_offset=[0, 0, 0.5], f_cutoff=1/
     # Remove edge effects
     edge = np.fix(1 * 30 * fs)
 
-    for sample in np.unique(ds.sample):
-
-        # Find the data associated with each sample
-        index, = np.where(ds.sample == sample)
-
-        # Get the start time
-        tstart = ds.time[index].min().values
-
-        # Get the deployment number
-        dep_num = ds.deployment[index]
-        
-        if len(index) < 10000:
-            pass
+    # Sort the data by sample once, so each sample is a contiguous block
+    # bounded by its start and end indices, rather than searching the full
+    # record for every sample. The samples are numbered in time order, so
+    # this is normally already the case and the slices below are views
+    # into the full arrays rather than copies.
+    times = ds.time.values
+    deployments = ds.deployment.values
+    if np.any(np.diff(sample) < 0):
+        order = np.argsort(sample, kind="stable")
+        sample = sample[order]
+        Platform = Platform[:, order]
+        Deg_rate = Deg_rate[:, order]
+        Compass = Compass[order]
+        times = times[order]
+        deployments = deployments[order]
+    _, starts = np.unique(sample, return_index=True)
+    ends = np.r_[starts[1:], len(sample)]
+
+    # Get the start time of every sample in one reduction over the blocks.
+    # np.minimum propagates NaT, so any missing times are swapped for the
+    # largest datetime first, and samples with no valid times are set back
+    # to NaT afterwards
+    if len(starts) > 0:
+        nat = np.isnat(times)
+        if nat.any():
+            latest = np.datetime64(np.iinfo(np.int64).max, np.datetime_data(times.dtype)[0])
+            sample_start_time = np.minimum.reduceat(np.where(nat, latest, times), starts)
+            sample_start_time[sample_start_time == latest] = np.datetime64("NaT")
         else:
-            # ----------------------------------------------------------------
-            # Get the angular rates, accelerations, and compass data 
-            # associated with the given sample data
-            platform = Platform[:, index]
-            deg_rate = Deg_rate[:, index]
-            gyro = Compass[index]
-
-            # ----------------------------------------------------------------
-            # Calculate the wave statistics
-            # Determine if to use dask or go serial
-            stats = wave_statistics(platform, deg_rate, gyro, fs, f_cutoff, com_offset, G, params, edge)
-            n, Hsig, t_sig, h_10, t_10, Tsig, h_avg, t_avg, Tdir, Ts, Fs, Hm0 = results
-
-            # Save the results
-            number_zero_crossings.append(n)         # Calculated from zero-crossings: Method B
-            significant_wave_height.append(Hsig)    # Calculated from zero-crossings: Method B
-            significant_wave_period.append(t_sig)   # Calculated from zero-crossings: Method B
-            wave_height_10.append(h_10)             # Calculated from zero-crossings: Method B
-            wave_period_10.append(t_10)             # Calculated from zero-crossings: Method B
-            peak_wave_period.append(Tsig)           # Calculated from zero-crossings: Method A
-            mean_wave_height.append(h_avg)          # Calculated from zero-crossings: Method B
-            mean_wave_period.append(t_avg)          # Calculated from zero-crossings: Method B
-            peak_wave_direction_puv.append(Tdir)    # Calculated from the PUV method
-            peak_wave_spread_puv.append(Ts)         # Calculated from the PUV method
-            peak_wave_period_puv.append(1/Fs)       # Calculated from the PUV method
-            significant_wave_height_puv.append(Hm0) # Calculated from the PUV method (Hm0)
-            sample_start_time.append(tstart)
+            sample_start_time = np.minimum.reduceat(times, starts)
+    else:
+        sample_start_time = times[:0]
+
+    # Only the samples long enough to process produce wave statistics, so
+    # the results can be preallocated and filled in by index
+    full = (ends - starts) >= 10000
+    starts = starts[full]
+    ends = ends[full]
+    sample_start_time = sample_start_time[full].astype("datetime64[ns]")
+    n_samples = len(starts)
+
+    number_zero_crossings = np.empty(n_samples, dtype=int)
+    significant_wave_height = np.empty(n_samples)
+    significant_wave_period = np.empty(n_samples)
+    wave_height_10 = np.empty(n_samples)
+    wave_period_10 = np.empty(n_samples)
+    peak_wave_period = np.empty(n_samples)
+    mean_wave_height = np.empty(n_samples)
+    mean_wave_period = np.empty(n_samples)
+    peak_wave_direction_puv = np.empty(n_samples)
+    peak_wave_spread_puv = np.empty(n_samples)
+    peak_wave_period_puv = np.empty(n_samples)
+    significant_wave_height_puv = np.empty(n_samples)
+
+    # ----------------------------------------------------------------
+    # Get the angular rates, accelerations, and compass data associated
+    # with each sample. These are views into the full arrays, which the
+    # despiking cleans in place when run sequentially; that is safe as the
+    # samples do not overlap and each is only processed once.
+    platforms = [Platform[:, a:b] for a, b in zip(starts, ends)]
+    deg_rates = [Deg_rate[:, a:b] for a, b in zip(starts, ends)]
+    gyros = [Compass[a:b] for a, b in zip(starts, ends)]
+
+    # ----------------------------------------------------------------
+    # Calculate the wave statistics
+    part_stats = partial(wave_statistics, fs=fs, f_cutoff=f_cutoff, com_offset=com_offset, G=G, params=params,
+                         edge=edge)
+    if n_samples <= 5 or N_CORES < 2:
+        # just a few samples (or cores), process sequentially
+        results = [part_stats(*args) for args in zip(platforms, deg_rates, gyros)]
+    else:
+        # multiple samples, each sample is independent so process them in parallel
+        with worker_pool(N_CORES) as executor:
+            chunksize = max(1, n_samples // (4 * N_CORES))
+            results = list(tqdm(executor.map(part_stats, platforms, deg_rates, gyros, chunksize=chunksize),
+                                total=n_samples, desc='Calculating the wave statistics', file=sys.stdout))
+
+    for i, stats in enumerate(results):
+        n, Hsig, t_sig, h_10, t_10, Tsig, h_avg, t_avg, Tdir, Ts, Fs, Hm0 = stats
+
+        # Save the results
+        number_zero_crossings[i] = n            # Calculated from zero-crossings: Method B
+        significant_wave_height[i] = Hsig       # Calculated from zero-crossings: Method B
+        significant_wave_period[i] = t_sig      # Calculated from zero-crossings: Method B
+        wave_height_10[i] = h_10                # Calculated from zero-crossings: Method B
+        wave_period_10[i] = t_10                # Calculated from zero-crossings: Method B
+        peak_wave_period[i] = Tsig              # Calculated from zero-crossings: Method A
+        mean_wave_height[i] = h_avg             # Calculated from zero-crossings: Method B
+        mean_wave_period[i] = t_avg             # Calculated from zero-crossings: Method B
+        peak_wave_direction_puv[i] = Tdir       # Calculated from the PUV method
+        peak_wave_spread_puv[i] = Ts            # Calculated from the PUV method
+        peak_wave_period_puv[i] = 1/Fs          # Calculated from the PUV method
+        significant_wave_height_puv[i] = Hm0    # Calculated from the PUV method (Hm0)
 
     # --------------------------------------------------------------------
-    # Get the deployment number
-    deployment = np.unique(ds.deployment)
+    # Get the deployment number of each sample from its first record,
+    # rather than searching the full record for the unique values
+    deployment = deployments[starts]
 
     # --------------------------------------------------------------------
     # Build the wave statistics dataset
@@ -1583,22 +1830,19 @@ def calculate_wave_statistics(ds, n_std, fs, com_offset=[0, 0, 0.5], f_cutoff=1/
 def wave_statistics(platform, deg_rate, gyro, fs, f_cutoff, com_offset, G, params, edge):
     """Wrapper function to calculate the directional and non-directional wave statistics."""
     
-    # Calculate the local gravity
-    gravxyz = np.mean(platform.transpose(), axis=0) / G
-
     # Get the velocities and displacements
     uvw, xyz = uvw_xyz(gyro, platform, deg_rate, fs, f_cutoff, com_offset, G)
 
     # Remove the data at the beginning and end of the timeseries to 
-    # reduce edge effects due to filtering
-    incra = edge
-    incrb = xyz.shape[-1] - edge
-    incr = np.arange(incra, incrb+1, 1)
-    incr = [int(x) for x in incr]
+    # reduce edge effects due to filtering. The retained range is
+    # contiguous, so slicing gives views rather than copies.
+    incra = int(edge)
+    incrb = int(xyz.shape[-1] - edge)
+    incr = slice(incra, incrb+1)
 
     # Calculate non-directional statistics from the zero-crossings
-    z = xyz[2, :][incr]
-    npt = np.min([2**13, len(incr)])
+    z = xyz[2, incr]
+    npt = np.min([2**13, len(z)])
     
     # Method A (Peak Wave Period) and check on displacement (Havg here should be zero)
     Hsig, Havg, Tsig, Tavg = non_directional_statistics(z, fs, npt)
@@ -1607,8 +1851,8 @@ def wave_statistics(platform, deg_rate, gyro, fs, f_cutoff, com_offset, G, param
     n, h_sig, t_sig, h_10, t_10, h_avg, t_avg = zero_crossing(z, fs)
 
     # Calucate the wave spectra and the directional statistics
-    vu = uvw[1, :][incr]
-    vv = -uvw[0, :][incr]
+    vu = uvw[1, incr]
+    vv = -uvw[0, incr]
     vp = z
 
     # Wave spectra
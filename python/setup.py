@@ -44,6 +44,7 @@ setup(
         'tqdm',
         'urllib3',
         'numpy',
+        'numba',
         'pandas',
         'gsw',
         'requests',
@@ -0,0 +1,96 @@
+import numpy as np
+import xarray as xr
+
+from ooi_data_explorations.uncabled.process_mopak import (build_dataset, identify_samples, magnetometer, uvw_xyz,
+                                                          wave_statistics)
+
+FS = 10.0
+G = 9.8
+PARAMS = [0.03, 200, 0.1, 0]
+
+
+def _burst(n=12000, seed=0):
+    """Synthetic 20 minute MOPAK burst, with a heading that wraps across +/-pi."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(n) / FS
+    az = np.zeros(n)
+    for period, amplitude in [(8.0, 0.6), (11.0, 0.4), (5.5, 0.25)]:
+        w = 2 * np.pi / period
+        az -= amplitude * w**2 * np.sin(w * t + rng.uniform(0, 2 * np.pi))
+    platform = np.vstack([0.3 * np.sin(2 * np.pi * t / 9 + 1.0) + 0.05 * rng.standard_normal(n),
+                          0.2 * np.sin(2 * np.pi * t / 7 + 0.3) + 0.05 * rng.standard_normal(n),
+                          az + G + 0.05 * rng.standard_normal(n)])
+    angular_rates = np.vstack([0.05 * np.sin(2 * np.pi * t / 8),
+                               0.04 * np.cos(2 * np.pi * t / 9),
+                               0.01 * rng.standard_normal(n)])
+    gyro = 3.1 + 0.05 * np.sin(2 * np.pi * t / 30) + 0.01 * rng.standard_normal(n)
+    gyro = np.mod(gyro + np.pi, 2 * np.pi) - np.pi
+    return platform, angular_rates, gyro
+
+
+def _bursts(lengths, starts):
+    """Dataset of 1 Hz bursts of the given lengths, starting at the given offsets (s) from the first."""
+    t0 = np.datetime64('2023-01-01T00:00:00', 'ns')
+    time = np.concatenate([t0 + np.timedelta64(start, 's') + np.arange(n).astype('timedelta64[s]')
+                           for n, start in zip(lengths, starts)])
+    return xr.Dataset(coords={'time': time})
+
+
+def test_identify_samples_final_burst():
+    # the final burst is numbered on its own, rather than merged into the one before it
+    sample = identify_samples(_bursts([5, 5, 3], [0, 3600, 7200]), 2400)
+    np.testing.assert_array_equal(sample, np.repeat([0, 1, 2], [5, 5, 3]))
+
+
+def test_identify_samples_multi_day_gap():
+    # a gap of just over a day is a new sample (its seconds component alone is under a minute)
+    sample = identify_samples(_bursts([5, 5], [0, 86400 + 60]), 2400)
+    np.testing.assert_array_equal(sample, np.repeat([0, 1], [5, 5]))
+
+
+def test_magnetometer_wraps_full_circle():
+    # headings pushed past -pi by the declination are wrapped by 2*pi, not pi
+    theta = np.linspace(-np.pi, np.pi, 361)
+    ds = xr.Dataset({'mopak_magx': ('time', np.cos(theta)), 'mopak_magy': ('time', np.sin(theta)),
+                     'mopak_magz': ('time', np.zeros_like(theta))})
+    dev = -10 * np.pi / 180
+    expected = -(np.mod(np.arctan2(-ds.mopak_magy.values, ds.mopak_magx.values) + dev + np.pi, 2 * np.pi) - np.pi)
+    compass = magnetometer(ds)
+    assert np.all(np.abs(compass) <= np.pi)
+    np.testing.assert_allclose(compass, expected, atol=1e-12)
+
+
+def _build(deployment):
+    """Wave statistics dataset for three samples, all statistics set to 1."""
+    ds = xr.Dataset(attrs={'id': 'CE02SHSM-SBD11-01-MOPAK0000-telemetered-mopak_o_dcl_accel',
+                           'lat': 44.6, 'lon': -124.3})
+    start = np.datetime64('2023-01-01T00:00:00', 'ns') + np.arange(3) * np.timedelta64(1, 'h')
+    return build_dataset(ds, *[np.ones(3)] * 12, start, deployment)
+
+
+def test_build_dataset_deployment():
+    # each sample keeps its own deployment number, and a single number applies to every sample
+    np.testing.assert_array_equal(_build([3, 3, 4]).deployment, [3, 3, 4])
+    np.testing.assert_array_equal(_build(3).deployment, [3, 3, 3])
+    np.testing.assert_array_equal(_build(np.array([3])).deployment, [3, 3, 3])
+
+
+def test_uvw_xyz_nan_compass():
+    # a single missing compass sample should not carry through the rest of the burst
+    platform, angular_rates, gyro = _burst()
+    gyro[3000] = np.nan
+    uvw, xyz = uvw_xyz(gyro, platform, angular_rates, FS)
+    assert np.all(np.isfinite(uvw))
+    assert np.all(np.isfinite(xyz))
+
+
+def test_wave_statistics_nan_compass():
+    # the peak wave direction should be unchanged by a single missing compass sample
+    platform, angular_rates, gyro = _burst()
+    gyro_nan = gyro.copy()
+    gyro_nan[3000] = np.nan
+    stats = wave_statistics(platform.copy(), angular_rates.copy(), gyro, FS, 1/30, [0, 0, 0.5], G, PARAMS,
+                            np.fix(30 * FS))
+    stats_nan = wave_statistics(platform.copy(), angular_rates.copy(), gyro_nan, FS, 1/30, [0, 0, 0.5], G,
+                                PARAMS, np.fix(30 * FS))
+    assert np.isclose(stats_nan[8], stats[8], atol=0.01)